@@ -1,58 +1,213 @@
 #! /usr/bin/python3
 
+import argparse
+import hashlib
 import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-def get_file_list(dataset_name):
+# Define the Global Redirector.
+# This allows ROOT to access files via XRootD from any location.
+REDIRECTOR = "root://cms-xrd-global.cern.ch//"
+##REDIRECTOR = "root://xrootd-cms.infn.it//"
+
+# Resolved LFN lists are cached here, one file per dataset.
+CACHE_DIR = Path.home() / ".cache" / "das_query"
+CACHE_TTL = 24 * 3600 # seconds
+
+def _cache_path(dataset_name):
+    key = hashlib.sha1(dataset_name.encode()).hexdigest()
+    return CACHE_DIR / f"{key}.txt"
+
+def _iter_lfns(dataset_name, use_cache=True, ttl=CACHE_TTL):
     """
-    Queries the CMS Data Aggregation System (DAS) to get the list of files
-    for a given dataset and prepends the XRootD redirector.
+    Yields the LFNs of a dataset one by one.
+    If a cached result younger than 'ttl' seconds exists, DAS is not contacted.
+    Otherwise dasgoclient is run and its output is consumed line by line as it
+    arrives, while the raw LFNs are written to a temporary cache file.
+    Raises RuntimeError if dasgoclient fails.
     """
-    
+
+    cache_path = _cache_path(dataset_name)
+    if use_cache and cache_path.exists() and time.time() - cache_path.stat().st_mtime < ttl:
+        print(f"[CACHE] Using cached file list for {dataset_name}")
+        with open(cache_path) as f_cache:
+            for ln in f_cache:
+                yield ln.rstrip("\n")
+        return
+
     # Construct the DAS query command.
     # 'limit=0' ensures we fetch all files, not just a partial list.
-    query = f'dasgoclient --query="file dataset={dataset_name}" --limit=0'
-    
-    print(f"Executing DAS query: {query}")
+    # 'format=plain' pins the output to one LFN per line.
+    query = ["dasgoclient", "--query", f"file dataset={dataset_name}", "--limit=0", "--format=plain"]
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    count = 0
+    try:
+        proc = subprocess.Popen(query, stdout=subprocess.PIPE, text=True)
+    except OSError as e:
+        raise RuntimeError(f"Cannot run dasgoclient ({e}). Please set up the CMS environment (cmsenv).") from e
+    # Unique temporary file per call: threads of the same process (e.g. the same
+    # dataset listed twice in a config) never write into each other's file.
+    with tempfile.NamedTemporaryFile("w", dir=CACHE_DIR, prefix=f"{cache_path.name}.", suffix=".tmp", delete=False) as f_cache:
+        tmp_path = Path(f_cache.name)
+        for ln in proc.stdout:
+            lfn = ln.strip()
+            if not lfn: continue
+            # Anything that is not a file path (warnings, status lines) must not end up in the list
+            if not lfn.startswith("/store/"):
+                print(f"[dasgoclient] {lfn}", file=sys.stderr)
+                continue
+            f_cache.write(lfn + "\n")
+            count += 1
+            yield lfn
+    proc.wait()
+
+    if proc.returncode != 0 or count == 0:
+        tmp_path.unlink()
+        if proc.returncode != 0:
+            raise RuntimeError(f"dasgoclient exited with code {proc.returncode} for {dataset_name}. Please check your proxy (voms-proxy-init) or the dataset name.")
+        return
+
+    # Atomic replace: a concurrent reader never sees a half-written cache file.
+    # If it fails, the LFNs have already been yielded; only the cache entry is lost.
+    try:
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"[CACHE] Could not store the file list of {dataset_name}: {e}", file=sys.stderr)
+        tmp_path.unlink(missing_ok=True)
+
+def _query_one(dataset_name, use_cache=True, ttl=CACHE_TTL):
+    """
+    Runs a single DAS query and returns (dataset_name, [PFN, ...]).
+    An empty list is returned if dasgoclient fails.
+    """
+    try:
+        # Prepend the redirector to each file path (LFN -> PFN).
+        return dataset_name, [REDIRECTOR + lfn for lfn in _iter_lfns(dataset_name, use_cache, ttl)]
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return dataset_name, []
+
+def fetch_file_list(dataset_name, output_filename, use_cache=True, ttl=CACHE_TTL):
+    """
+    Streams the PFNs of a dataset straight into output_filename, without
+    building an intermediate list. Returns (dataset_name, number of files).
+    """
+    count = 0
+    try:
+        # e.g. 'lists/filelist_ttHH.txt': the list directory is created if needed
+        out_dir = os.path.dirname(output_filename)
+        if out_dir: os.makedirs(out_dir, exist_ok=True)
+        with open(output_filename, "w") as out:
+            for lfn in _iter_lfns(dataset_name, use_cache, ttl):
+                out.write(REDIRECTOR)
+                out.write(lfn)
+                out.write("\n")
+                count += 1
+    except (RuntimeError, OSError) as e:
+        # Reported for this dataset only; the other queries of the pool go on
+        print(f"Error: {e}")
+        count = 0
+
+    if count == 0 and os.path.exists(output_filename):
+        os.remove(output_filename)
+    return dataset_name, count
+
+def get_file_list(dataset_name, use_cache=True):
+    """
+    Queries the CMS Data Aggregation System (DAS) to get the list of files
+    for a given dataset and prepends the XRootD redirector.
+    """
+
+    print(f"Executing DAS query: file dataset={dataset_name}")
     print("Please wait, this might take a moment...")
 
-    # Execute the command in the shell and read the output.
-    # returning a list of file paths (Logical File Names - LFN).
-    files = os.popen(query).read().split()
-    
-    if not files:
+    _, full_paths = _query_one(dataset_name, use_cache=use_cache)
+
+    if not full_paths:
         print("Error: No files found. Please check your proxy (voms-proxy-init) or the dataset name.")
         return []
 
-    # Define the Global Redirector.
-    # This allows ROOT to access files via XRootD from any location.
-    redirector = "root://cms-xrd-global.cern.ch//"
-##    redirector = "root://xrootd-cms.infn.it//"
-
-    # Prepend the redirector to each file path (LFN -> PFN).
-    full_paths = [redirector + f for f in files]
-    
     return full_paths
 
+def get_file_lists(datasets, max_workers=8, use_cache=True):
+    """
+    Queries DAS for several datasets concurrently.
+    The cost of a query is dominated by the round-trip to the DAS server,
+    so running them in a thread pool overlaps the waiting time.
+    Returns a dict {dataset_name: [PFN, ...]}.
+    """
+
+    print(f"Executing {len(datasets)} DAS queries ({max_workers} in parallel)...")
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        results = dict(ex.map(lambda ds: _query_one(ds, use_cache=use_cache), datasets))
+
+    return results
+
+def read_dataset_config(config_file):
+    """
+    Reads a dataset config file.
+    Format (one dataset per line): DatasetName OutputListFile
+    Empty lines and lines starting with '#' are ignored.
+    """
+    entries = []
+    with open(config_file) as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'): continue
+            parts = line.split()
+            if len(parts) < 2:
+                print(f"[WARNING] Skipping invalid line: {line.strip()}")
+                continue
+            entries.append((parts[0], parts[1]))
+    return entries
+
 if __name__ == "__main__":
-    # --- Configuration ---
-    # The specific dataset you requested
-    target_dataset = "/TTHHTo4b_TuneCP5_13TeV-madgraph-pythia8/RunIISummer20UL17NanoAODv9-106X_mc2017_realistic_v9-v2/NANOAODSIM"
-    output_filename = "file_list.txt"
-
-    # --- Execution ---
-    # Get the list of files
-    file_list = get_file_list(target_dataset)
-
-    # Save the result to a text file
-    if file_list:
-        with open(output_filename, "w") as f_out:
-            for file_path in file_list:
-                f_out.write(file_path + "\n")
-        
-        print(f"Success! Found {len(file_list)} files.")
-        print(f"File list saved to: {output_filename}")
-        
-        # Print the first 3 files as a sanity check
-        print("\n[Preview of first 3 files]")
-        for i in range(min(3, len(file_list))):
-            print(file_list[i])
+    parser = argparse.ArgumentParser(description="Get the file list of CMS dataset(s) from DAS")
+    parser.add_argument("config", nargs="?", help="Optional dataset config file (DatasetName OutputListFile per line)")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="Number of parallel DAS queries (default: 8)")
+    parser.add_argument("--no-cache", action="store_true", help="Always query DAS, ignoring the local cache (~/.cache/das_query)")
+    args = parser.parse_args()
+
+    if args.config:
+        # --- Multiple datasets from config file ---
+        entries = read_dataset_config(args.config)
+
+        # Each query streams into its own output file; the thread pool overlaps the DAS round-trips
+        print(f"Executing {len(entries)} DAS queries ({args.jobs} in parallel)...")
+        with ThreadPoolExecutor(max_workers=args.jobs) as ex:
+            counts = list(ex.map(lambda e: fetch_file_list(e[0], e[1], use_cache=not args.no_cache), entries))
+
+        for (ds, output_filename), (_, count) in zip(entries, counts):
+            if count == 0:
+                print(f"[WARNING] No files found for {ds}")
+                continue
+            print(f"[{count:6d} files] {output_filename}")
+
+    else:
+        # --- Configuration ---
+        # The specific dataset you requested
+        target_dataset = "/TTHHTo4b_TuneCP5_13TeV-madgraph-pythia8/RunIISummer20UL17NanoAODv9-106X_mc2017_realistic_v9-v2/NANOAODSIM"
+        output_filename = "file_list.txt"
+
+        # --- Execution ---
+        # Get the list of files and save it to a text file
+        print(f"Executing DAS query: file dataset={target_dataset}")
+        print("Please wait, this might take a moment...")
+        _, count = fetch_file_list(target_dataset, output_filename, use_cache=not args.no_cache)
+
+        if count == 0:
+            print("Error: No files found. Please check your proxy (voms-proxy-init) or the dataset name.")
+        else:
+            print(f"Success! Found {count} files.")
+            print(f"File list saved to: {output_filename}")
+
+            # Print the first 3 files as a sanity check
+            print("\n[Preview of first 3 files]")
+            with open(output_filename) as f_list:
+                for _, file_path in zip(range(3), f_list):
+                    print(file_path.rstrip())
@@ -1,190 +1,1534 @@
 #!/usr/bin/env python3
+"""
+CMS Analysis Framework Generator
+
+Layouts:
+  basic    : MakeClass skeleton, main.cc, Makefile, submit_condor.py
+  advanced : Same structure, plus user settings injected into the header
+             (weight, isData, process, output file) and a fully implemented
+             Loop() with Muon/Electron/Jet histograms.
+
+Structure:
+  - main.cc, Makefile, submit_condor.py (Root)
+  - include/ (.h)
+  - src/ (.C)
+  - condor/ (Logs and submission files will be created here)
+"""
 import sys
 import os
 import argparse
-import shutil
-import textwrap
-
-def main():
-    """
-    CMS Analysis Framework Generator (Basic)
-    Structure:
-      - main.cc, Makefile, submit_condor.py (Root)
-      - include/ (.h)
-      - src/ (.C)
-      - condor/ (Logs and submission files will be created here)
-    """
-    parser = argparse.ArgumentParser(description="Generate a Basic CMS Analysis Framework")
-    parser.add_argument("-f", "--file", required=True, help="Sample ROOT file path")
-    parser.add_argument("-t", "--tree", default="Events", help="TTree name (default: Events)")
-    parser.add_argument("-c", "--class", dest="classname", default="CMSAnalyzer", help="Class Name")
-    args = parser.parse_args()
-
-    sample_file = args.file
-    tree_name = args.tree
-    class_name = args.classname
-    output_dir = class_name
-
-    print(f"[INFO] Initializing Basic Framework in: {output_dir}/")
-
-    # 1. Check ROOT
-    try: import ROOT
-    except ImportError: sys.exit("[ERROR] ROOT not found.")
+import getpass
+import hashlib
+import re
+import subprocess
 
-    # 2. Open File & Get Tree
-    ROOT.gROOT.SetBatch(True)
-    f = ROOT.TFile.Open(sample_file, "READ")
-    if not f or f.IsZombie(): sys.exit(f"[ERROR] Cannot open {sample_file}")
-    tree = f.Get(tree_name)
-    if not tree: sys.exit(f"[ERROR] Tree '{tree_name}' not found.")
+LAYOUTS = ("basic", "advanced")
 
-    # 3. Create Directories
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        os.makedirs(os.path.join(output_dir, "src"))
-        os.makedirs(os.path.join(output_dir, "include"))
-        # We don't necessarily need to create 'condor' here, submitter will do it, 
-        # but creating it ensures the structure is visible.
-        os.makedirs(os.path.join(output_dir, "condor"))
+# makeclass : TTree::MakeClass analyzer (include/, src/) run by main.cc
+# rdf       : RDataFrame analysis written directly in main.cc (no MakeClass)
+# reader    : TTreeReader analyzer (include/, src/) run by main.cc; no MakeClass,
+#             only the branches with a reader member are read
+# numba     : Python analyzer (uproot + awkward) with Numba-compiled histogram kernels
+BACKENDS = ("makeclass", "rdf", "reader", "numba")
 
-    original_cwd = os.getcwd()
-    os.chdir(output_dir)
+DESCRIPTIONS = {
+    "basic": "Generate a Basic CMS Analysis Framework",
+    "advanced": "Generate an Advanced CMS Analysis Framework",
+}
 
-    # 4. Run MakeClass
-    print(f"[INFO] Running MakeClass('{class_name}')...")
-    tree.MakeClass(class_name)
-    f.Close()
-
-    # 5. Move Files
-    if os.path.exists(f"{class_name}.C"): shutil.move(f"{class_name}.C", f"src/{class_name}.C")
-    if os.path.exists(f"{class_name}.h"): shutil.move(f"{class_name}.h", f"include/{class_name}.h")
+# Histogram binnings (nbins, xmin, xmax), shared by every backend.
+# wide   : full kinematic range (default)
+# narrow : finer binning of the low-pT / central region
+HIST_BINS = {
+    "wide": {
+        "mu_pt":   (200,  0.0, 2000.0),
+        "mu_eta":  ( 60, -5.0,    5.0),
+        "mu_phi":  ( 60, -5.0,    5.0),
+        "ele_pt":  (200,  0.0, 2000.0),
+        "ele_eta": (100, -5.0,    5.0),
+        "ele_phi": (100, -5.0,    5.0),
+        "jet_pt":  (200,  0.0, 2000.0),
+        "jet_eta": (100, -5.0,    5.0),
+        "jet_phi": (100, -5.0,    5.0),
+    },
+    "narrow": {
+        "mu_pt":   (100,  0.0,  300.0),
+        "mu_eta":  ( 50, -2.5,    2.5),
+        "mu_phi":  ( 64, -3.2,    3.2),
+        "ele_pt":  (100,  0.0,  300.0),
+        "ele_eta": ( 50, -2.5,    2.5),
+        "ele_phi": ( 64, -3.2,    3.2),
+        "jet_pt":  (100,  0.0,  300.0),
+        "jet_eta": ( 50, -2.5,    2.5),
+        "jet_phi": ( 64, -3.2,    3.2),
+    },
+}
 
-    # 6. Generate main.cc (At Root)
-    with open("main.cc", "w") as f_main:
-        f_main.write(f"""/**
+# ==========================================
+# main.cc
+# ==========================================
+MAIN_TMPL = """/**
  * @file main.cc
- * @brief Main driver for {class_name}
+ * @brief {brief} driver for {class_name}
  */
-#include "{class_name}.h"
+{includes}
 #include <iostream>
-#include <fstream>
+#include <string>
+#include <cstdlib>
+#include <cstring>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 #include "TChain.h"
 
+// Adds every path of a file list to the chain ('#' lines are skipped).
+// The whole list is mapped and split on newlines (no per-line reads).
+static bool AddFileList(TChain *chain, const std::string &listFileName) {{
+    int fd = open(listFileName.c_str(), O_RDONLY);
+    if (fd < 0) {{
+        std::cerr << "[ERROR] Cannot open file list: " << listFileName << std::endl;
+        return false;
+    }}
+    struct stat st;
+    if (fstat(fd, &st) != 0) {{
+        std::cerr << "[ERROR] Cannot stat file list: " << listFileName << std::endl;
+        close(fd);
+        return false;
+    }}
+    if (st.st_size > 0) {{
+        // Private (copy-on-write) mapping: paths are terminated in place,
+        // the list file itself is never modified
+        char *base = (char*)mmap(nullptr, st.st_size, PROT_READ | PROT_WRITE, MAP_PRIVATE, fd, 0);
+        if (base == MAP_FAILED) {{
+            std::cerr << "[ERROR] Cannot map file list: " << listFileName << std::endl;
+            close(fd);
+            return false;
+        }}
+        char *p = base, *end = base + st.st_size;
+        while (p < end) {{
+            char *eol = (char*)memchr(p, '\\n', end - p);
+            if (!eol) eol = end;
+            // Strip trailing '\\r' (CRLF lists) and blanks
+            char *stop = eol;
+            while (stop > p && (stop[-1] == '\\r' || stop[-1] == ' ' || stop[-1] == '\\t')) stop--;
+            if (stop != p && *p != '#') {{
+                if (stop < end) {{ *stop = '\\0'; chain->Add(p); }}
+                else chain->Add(std::string(p, stop - p).c_str()); // last line without newline
+            }}
+            p = eol + 1;
+        }}
+        munmap(base, st.st_size);
+    }}
+    close(fd);
+    return true;
+}}
+
 int main(int argc, char* argv[]) {{
     if (argc < 2) {{
-        std::cout << "Usage: " << argv[0] << " <file_list.txt> [output_file_name]" << std::endl;
+        std::cout << "Usage: " << argv[0] << " {usage}" << std::endl;
         return 1;
     }}
+
     std::string listFileName = argv[1];
-    // Output filename argument (optional in basic version)
-    std::string outFileName = (argc > 2) ? argv[2] : "output.root";
-    
+    std::string outFileName  = (argc > 2) ? argv[2] : "output.root";
+{extra_args}
     TChain *chain = new TChain("{tree_name}");
-    std::ifstream infile(listFileName);
-    std::string line;
-    while (std::getline(infile, line)) {{
-        if (line.empty() || line[0] == '#') continue;
-        chain->Add(line.c_str());
-    }}
+
+    // A single ROOT file (local path or root:// URL) can be given instead of a list
+    const std::string ext = ".root";
+    if (listFileName.size() > ext.size() && listFileName.compare(listFileName.size() - ext.size(), ext.size(), ext) == 0)
+        chain->Add(listFileName.c_str());
+    else if (!AddFileList(chain, listFileName))
+        return 1;
+
+{run}    return 0;
+}}
+"""
+
+MAIN_INCLUDES = {
+    "makeclass": '#include "{class_name}.h"\n#include "TEnv.h"',
+    "rdf": '#include <ROOT/RDataFrame.hxx>\n#include "TFile.h"\n#include "Compression.h"\n#include <vector>',
+}
+
+# Analysis part of main.cc, run once the chain is filled
+MAIN_RUN = {
+    "makeclass": """\
+    // Baskets of the next cache block are fetched in the background while
+    // the current one is processed (set before any input file is opened)
+    gEnv->SetValue("TFile.AsyncPrefetching", 1);
 
     {class_name} t(chain);
+{settings}{chain_cache}
     t.Loop();
-    return 0;
-}}
-""")
+""",
+    "rdf": """\
+    // --- RDataFrame analysis: the event loop runs on all cores ---
+    // (or on OMP_NUM_THREADS threads, like the OpenMP Loop(); HTCondor sets it from request_cpus)
+    const char *nThreads = std::getenv("OMP_NUM_THREADS");
+    ROOT::EnableImplicitMT(nThreads ? std::atoi(nThreads) : 0);
+    ROOT::RDataFrame df(*chain);
+    const float w = {rdf_weight};
+    // Scalar event weight: Histo1D applies it to every element of a collection
+    // column, so no per-object weight vector is built
+    auto d = df.Define("w", [w] {{ return w; }});
+
+    // ===== User section: book Filters / Defines / histograms here =====
+{rdf_histos}    // ===================================================================
+
+    // Accessing the first result triggers a single loop filling all booked histograms
+    TFile f_out(outFileName.c_str(), "RECREATE", "", ROOT::CompressionSettings(ROOT::RCompressionSetting::EAlgorithm::kLZ4, 4));
+    for (auto &h : histos) h->Write();
+    f_out.Close();
+    std::cout << "[RDF] Output saved to " << outFileName << std::endl;
+""",
+}
+
+# Histograms booked by the rdf backend (same content as the makeclass Loop())
+RDF_HISTOS = {
+    "basic": """\
+    std::vector<ROOT::RDF::RResultPtr<TH1D>> histos = {{
+        d.Histo1D({{"h_mu_pt", "Muon p_{{T}};p_{{T}} (GeV);Events", {mu_pt}}}, "Muon_pt", "w"),
+    }};
+""",
+    "advanced": """\
+    // Objects passing the cuts
+    auto s = d.Define("mu_pt",   "Muon_pt[Muon_pt > 10.f]")
+              .Define("mu_eta",  "Muon_eta[Muon_pt > 10.f]")
+              .Define("mu_phi",  "Muon_phi[Muon_pt > 10.f]")
+              .Define("ele_pt",  "Electron_pt[Electron_pt > 10.f]")
+              .Define("ele_eta", "Electron_eta[Electron_pt > 10.f]")
+              .Define("ele_phi", "Electron_phi[Electron_pt > 10.f]")
+              .Define("jet_pt",  "Jet_pt[Jet_pt > 30.f]")
+              .Define("jet_eta", "Jet_eta[Jet_pt > 30.f]")
+              .Define("jet_phi", "Jet_phi[Jet_pt > 30.f]");
+
+    std::vector<ROOT::RDF::RResultPtr<TH1D>> histos = {{
+        s.Histo1D({{"h_mu_pt",   "Muon p_{{T}};p_{{T}} (GeV);Events", {mu_pt}}}, "mu_pt", "w"),
+        s.Histo1D({{"h_mu_eta",  "Muon #eta;#eta;Events", {mu_eta}}}, "mu_eta", "w"),
+        s.Histo1D({{"h_mu_phi",  "Muon #phi;#phi;Events", {mu_phi}}}, "mu_phi", "w"),
+        s.Histo1D({{"h_ele_pt",  "Electron p_{{T}};p_{{T}} (GeV);Events", {ele_pt}}}, "ele_pt", "w"),
+        s.Histo1D({{"h_ele_eta", "Electron #eta;#eta;Events", {ele_eta}}}, "ele_eta", "w"),
+        s.Histo1D({{"h_ele_phi", "Electron #phi;#phi;Events", {ele_phi}}}, "ele_phi", "w"),
+        s.Histo1D({{"h_jet_pt",  "Jet p_{{T}};p_{{T}} (GeV);Events", {jet_pt}}}, "jet_pt", "w"),
+        s.Histo1D({{"h_jet_eta", "Jet #eta;#eta;Events", {jet_eta}}}, "jet_eta", "w"),
+        s.Histo1D({{"h_jet_phi", "Jet #phi;#phi;Events", {jet_phi}}}, "jet_phi", "w"),
+    }};
+""",
+}
+
+# Event weight used by the rdf backend
+RDF_WEIGHT = {
+    "basic": "1.f",
+    "advanced": "isData ? 1.f : weight",
+}
+
+MAIN_BRIEF = {
+    "basic": "Main",
+    "advanced": "Advanced",
+}
+
+MAIN_USAGE = {
+    "basic": "<file_list.txt|file.root> [output_file_name]",
+    "advanced": "<file_list|file.root> [output] [weight] [isData] [process]",
+}
+
+MAIN_EXTRA_ARGS = {
+    "basic": "",
+    "advanced": """\
+    float weight             = (argc > 3) ? atof(argv[3]) : 1.0;
+    bool isData              = (argc > 4) ? (bool)atoi(argv[4]) : false;
+    std::string process      = (argc > 5) ? argv[5] : "Unknown";
+""",
+}
 
-    # 7. Generate Makefile
-    with open("Makefile", "w") as f_make:
-        f_make.write(f"""CXX = g++
+MAIN_SETTINGS = {
+    "basic": "",
+    "advanced": """\
+    t.fOutputFileName = outFileName;
+    t.fWeight = weight;
+    t.fIsData = isData;
+    t.fProcess = process;
+    t.fCacheSize = {cache_mb}LL*1024*1024; // --cache-mb
+""",
+}
+
+# TTreeCache of the chain. The advanced Loop() never reads through the chain:
+# every thread opens the files itself and sizes its own cache from fCacheSize (MAIN_SETTINGS)
+MAIN_CHAIN_CACHE = {
+    "basic": """\
+    // TTreeCache: coalesce the basket reads into large (vector) reads,
+    // which matters most for remote (XRootD) files
+    chain->SetCacheSize({cache_mb}LL*1024*1024);
+    chain->SetCacheLearnEntries(100);
+    chain->AddBranchToCache("*", kTRUE);
+""",
+    "advanced": "",
+}
+
+# ==========================================
+# Makefile
+# ==========================================
+MAKEFILE_TMPL = """# Build: 'make' (= 'make release', optimized for this machine) or 'make debug'.
+# Run 'make clean' when switching between the two.
+# If condor worker nodes have an older CPU than the build machine, build with
+# e.g. 'make ARCH=-march=x86-64-v2'. The optimization level is set by OPT
+# (e.g. 'make OPT=-O2').
+# Profile-guided build: 'make pgo PGO_SAMPLE=<small file list>' builds an
+# instrumented binary, runs it on the sample, then rebuilds using the profile
+# (kept in pgo-data/; 'make clean' leaves it, 'make distclean' removes it).
+# 'make RNTUPLE=1' stores the advanced histograms as an RNTuple instead of TH1Fs.
+# Generated with --cuda, the advanced Loop() cuts and bins on the GPU (needs nvcc;
+# 'make CUDA=' builds the CPU version).
+CXX = g++
 INC = -Iinclude
-CXXFLAGS = -O2 -Wall -fPIC $(shell root-config --cflags) $(INC)
-LDFLAGS = $(shell root-config --libs)
+WARN ?= -Wall
+ARCH ?= -march=native
+OPT ?= -O3 -ftree-vectorize -funroll-loops
+OPTFLAGS = $(OPT) $(ARCH) -fopenmp-simd -fno-trapping-math -pipe -fno-plt
+LTOFLAGS = -flto=auto -fno-fat-lto-objects
+# OpenMP: the advanced Loop() processes TTree clusters in parallel (OMP_NUM_THREADS)
+OMPFLAGS = -fopenmp
+PROFFLAGS =
+# ROOT flags resolved by root-config when the Makefile was generated
+# ('make reconfigure' refreshes them, e.g. after switching ROOT versions)
+ROOT_CFLAGS := {root_cflags}
+ROOT_LIBS := {root_libs}
+# GPU filling: only when the CUDA source was generated (--cuda)
+CUDA ?= {cuda}
+CUDA_SRCS = {cuda_srcs}
+USE_CUDA = $(and $(CUDA),$(CUDA_SRCS))
+NVCC ?= nvcc
+CUDA_HOME ?= /usr/local/cuda
+NVCCFLAGS = -O3 -std=c++17 -Xcompiler -fPIC
+DEFINES = $(if $(RNTUPLE),-DUSE_RNTUPLE) $(if $(USE_CUDA),-DUSE_CUDA)
+CXXFLAGS = $(OPTFLAGS) $(LTOFLAGS) $(OMPFLAGS) $(PROFFLAGS) $(WARN) -fPIC $(ROOT_CFLAGS) $(DEFINES) $(INC)
+LDFLAGS = $(OPTFLAGS) $(LTOFLAGS) $(OMPFLAGS) $(PROFFLAGS) $(ROOT_LIBS) $(if $(RNTUPLE),-lROOTNTuple) $(if $(USE_CUDA),-L$(CUDA_HOME)/lib64 -lcudart)
 TARGET = runAnalysis
+MAKEFLAGS += -j$(shell nproc)
 
 # main.cc is in Root, Analyzer.C is in src
-SRCS = main.cc src/{class_name}.C
+HEADERS = {headers}
+SRCS = main.cc {analyzer_srcs}
 OBJS = $(SRCS:.cc=.o)
-OBJS := $(OBJS:.C=.o)
+OBJS := $(OBJS:.C=.o) $(if $(USE_CUDA),$(CUDA_SRCS:.cu=.o))
+
+# Precompiled ROOT headers: include/rootpch.h is force-included in every
+# source, so the compiler loads the .gch instead of re-parsing ROOT headers.
+PCH_SRC = include/rootpch.h
+PCH = $(PCH_SRC).gch
+PCHFLAGS = -include $(PCH_SRC)
+
+# Profile-guided optimization
+PGO_DIR = $(CURDIR)/pgo-data
+PGO_SAMPLE ?= pgo_sample.txt
+PGO_ARGS ?=
+
+.PHONY: all release debug pgo clean distclean reconfigure
 
 all: $(TARGET)
 
+release: all
+
+debug: OPTFLAGS = -O0 -g
+debug: LTOFLAGS =
+debug: all
+
+pgo:
+	$(MAKE) clean
+	$(MAKE) PROFFLAGS=-fprofile-generate=$(PGO_DIR)
+	mkdir -p $(PGO_DIR)
+	./$(TARGET) $(PGO_SAMPLE) $(PGO_DIR)/pgo_output.root $(PGO_ARGS)
+	$(MAKE) clean
+	$(MAKE) PROFFLAGS="-fprofile-use=$(PGO_DIR) -fprofile-partial-training -Wno-missing-profile"
+
 $(TARGET): $(OBJS)
 	$(CXX) -o $@ $^ $(LDFLAGS)
 
-%.o: %.cc
-	$(CXX) $(CXXFLAGS) -c $< -o $@
+$(PCH): $(PCH_SRC)
+	$(CXX) $(CXXFLAGS) -x c++-header $< -o $@
 
-src/%.o: src/%.C
-	$(CXX) $(CXXFLAGS) -c $< -o $@
+%.o: %.cc $(HEADERS) $(PCH)
+	$(CXX) $(CXXFLAGS) $(PCHFLAGS) -c $< -o $@
+
+src/%.o: src/%.C $(HEADERS) $(PCH)
+	$(CXX) $(CXXFLAGS) $(PCHFLAGS) -c $< -o $@
+
+src/%.o: src/%.cu
+	$(NVCC) $(NVCCFLAGS) -c $< -o $@
 
 clean:
-	rm -f *.o src/*.o $(TARGET)
-""")
-
-    # 8. Generate submit_condor.py (Pointing to 'condor/' directory)
-    condor_script = textwrap.dedent(f"""\
-    #!/usr/bin/env python3
-    import os, sys, subprocess
-
-    # --- Config ---
-    EXE_NAME = "runAnalysis"
-    EOS_BASE = "/eos/user/{os.getlogin()[0]}/{os.getlogin()}/AnalyzerOutput" # Default: User's EOS
-    
-    def main(config_file):
-        with open(config_file) as f:
-            for line in f:
-                if line.strip() and not line.startswith('#'):
-                    submit_job(line.strip())
-
-    def submit_job(line):
-        parts = line.split()
-        input_list, output_subdir = parts[0], parts[1]
-        
-        # All files go into 'condor/<output_subdir>'
-        job_dir = f"condor/{{output_subdir}}"
-        os.makedirs(job_dir, exist_ok=True)
-        
-        # Split input list
+	rm -f *.o src/*.o $(PCH) $(TARGET)
+
+distclean: clean
+	rm -rf $(PGO_DIR)
+
+reconfigure:
+	sed -i -e "s|^ROOT_CFLAGS :=.*|ROOT_CFLAGS := $$(root-config --cflags)|" \\
+	       -e "s|^ROOT_LIBS :=.*|ROOT_LIBS := $$(root-config --libs)|" Makefile
+"""
+
+# ROOT headers used by the MakeClass header and the analyzer, precompiled once.
+PCH_HEADER = """// Precompiled ROOT headers (built by the Makefile into rootpch.h.gch)
+#ifndef ROOTPCH_H
+#define ROOTPCH_H
+
+#include <TROOT.h>
+#include <TChain.h>
+#include <TFile.h>
+#include <TString.h>
+#include <TH1.h>
+#include <TH2.h>
+
+#include <iostream>
+#include <string>
+#include <vector>
+
+#endif
+"""
+
+# ==========================================
+# [Advanced] Analyzer source (.C)
+# ==========================================
+# Branches read by the advanced Loop(); every other branch is disabled in Init()
+USED_BRANCHES = [
+    "nMuon", "Muon_pt", "Muon_eta", "Muon_phi",
+    "nElectron", "Electron_pt", "Electron_eta", "Electron_phi",
+    "nJet", "Jet_pt", "Jet_eta", "Jet_phi",
+]
+
+ANALYZER_SRC_TMPL = """#define {class_name}_cxx
+#include "{class_name}.h"
+#include <TH1.h>
+#include <TH2.h>
+#include <TStyle.h>
+#include <TCanvas.h>
+#include <TChain.h>
+#include <TFile.h>
+#include <TROOT.h>
+#include <TTree.h>
+#include <TTreeReader.h>
+#include <TTreeReaderArray.h>
+#include <Compression.h>
+#include <omp.h>
+#include <algorithm>
+#include <iostream>
+#include <memory>
+#include <vector>
+#ifdef __AVX2__
+#include <immintrin.h>
+#endif
+#ifdef USE_RNTUPLE
+#include <ROOT/RNTupleModel.hxx>
+#include <ROOT/RNTupleWriter.hxx>
+#include <string>
+#endif
+
+// Filler for an equal-width TH1F: the bin is found with a precomputed reciprocal
+// bin width, instead of the virtual Fill() and TAxis::FindBin() division per call.
+// Bin contents and Sumw2 (when enabled) are updated directly; the statistics are
+// accumulated here and stored into the histogram by Flush().
+// Counts = true (data: weight 1, no Sumw2): the bins are plain integer counts,
+// added to the histogram by Flush(); every fill is one integer increment.
+// Cache-line aligned: the fillers of different OpenMP threads are written on
+// every fill and must never share a line (false sharing).
+template <bool Counts>
+struct alignas(64) FillEq {{
+   TH1F *h;
+   Float_t *cont;
+   Double_t *sumw2;
+   Double_t xmin, xmax, invw;
+   Int_t n;
+   Double_t stats[4] = {{0, 0, 0, 0}}; // sumw, sumw2, sumwx, sumwx2 (in-range entries)
+   Double_t entries = 0;
+   std::vector<UInt_t> counts; // Counts only
+
+   explicit FillEq(TH1F *hist)
+      : h(hist), cont(hist->GetArray()),
+        sumw2(hist->GetSumw2N() ? hist->GetSumw2()->GetArray() : nullptr),
+        xmin(hist->GetXaxis()->GetXmin()), xmax(hist->GetXaxis()->GetXmax()),
+        invw(hist->GetNbinsX() / (hist->GetXaxis()->GetXmax() - hist->GetXaxis()->GetXmin())),
+        n(hist->GetNbinsX()) {{
+      if (Counts) counts.assign(n + 2, 0);
+   }}
+
+   inline void operator()(Double_t x, Double_t w) {{
+      Int_t b = 0; // underflow (also NaN)
+      if (x >= xmax) b = n + 1; // overflow, checked first: +inf or huge x would overflow the cast
+      else if (x >= xmin) {{
+         b = (Int_t)((x - xmin) * invw) + 1;
+         if (b > n) b = n + 1; // rounding just below xmax
+      }}
+      if constexpr (Counts) ++counts[b];
+      else {{
+         cont[b] += w;
+         if (sumw2) sumw2[b] += w * w;
+      }}
+      entries++;
+      if (b > 0 && b <= n) {{
+         stats[0] += w; stats[1] += w * w; stats[2] += w * x; stats[3] += w * x * x;
+      }}
+   }}
+
+   // Adds unweighted bin counts (incl. under/overflow), e.g. computed on the GPU;
+   // the in-range statistics are taken at the bin centres
+   void AddCounts(const Double_t *c, Double_t w) {{
+      for (Int_t b = 0; b <= n + 1; b++) {{
+         if (c[b] == 0) continue;
+         if constexpr (Counts) counts[b] += (UInt_t)c[b];
+         else {{
+            cont[b] += w * c[b];
+            if (sumw2) sumw2[b] += w * w * c[b];
+         }}
+         entries += c[b];
+         if (b > 0 && b <= n) {{
+            const Double_t x = xmin + (b - 0.5) / invw;
+            stats[0] += w * c[b]; stats[1] += w * w * c[b]; stats[2] += w * c[b] * x; stats[3] += w * c[b] * x * x;
+         }}
+      }}
+   }}
+
+   void Flush() {{
+      if constexpr (Counts) for (Int_t b = 0; b <= n + 1; b++) cont[b] += counts[b];
+      h->PutStats(stats);
+      h->SetEntries(entries);
+   }}
+}};
+
+#ifdef USE_CUDA
+// Defined in src/{class_name}_cuda.cu ('make CUDA=1')
+void CudaFillCounts(const float *x, const float *cut_x, int n, float cut, double xmin, double xmax, int nbins, double *counts);
+#endif
+
+#ifdef __AVX2__
+// For every 8-bit compare mask, the numbers of its set lanes packed one per byte
+// (a table lookup instead of pext/pdep, which are microcoded and slow on AMD Zen1/Zen2)
+struct LaneTable {{
+   unsigned long long v[256];
+   constexpr LaneTable() : v() {{
+      for (int m = 0; m < 256; m++)
+         for (int l = 0, k = 0; l < 8; l++)
+            if (m >> l & 1) v[m] |= (unsigned long long)l << (8 * k++);
+   }}
+}};
+static constexpr LaneTable kLanes;
+#endif
+
+// Stores the indices i in [i0, iEnd) with x[i] > cut contiguously in idx and returns
+// their number, without a branch on the cut. With AVX2 ('make' builds with
+// -march=native), 8 values per step: the compare mask selects the passing lane
+// numbers from kLanes, and all 8 lanes are stored (idx needs iEnd - i0 entries).
+static inline UInt_t SelectAbove(TTreeReaderArray<Float_t> &x, UInt_t i0, UInt_t iEnd, Float_t cut, UInt_t *idx)
+{{
+   UInt_t k = 0, i = i0;
+#ifdef __AVX2__
+   if (iEnd - i0 >= 8 && x.IsContiguous()) {{
+      const Float_t *p = &x[0];
+      const __m256 vcut = _mm256_set1_ps(cut);
+      for (; i + 8 <= iEnd; i += 8) {{
+         const unsigned m = _mm256_movemask_ps(_mm256_cmp_ps(_mm256_loadu_ps(p + i), vcut, _CMP_GT_OQ));
+         const unsigned long long lanes = kLanes.v[m];
+         const __m256i vi = _mm256_add_epi32(_mm256_cvtepu8_epi32(_mm_cvtsi64_si128(lanes)), _mm256_set1_epi32(i));
+         _mm256_storeu_si256((__m256i*)(idx + k), vi);
+         k += __builtin_popcount(m);
+      }}
+   }}
+#endif
+   for (; i < iEnd; i++) {{
+      idx[k] = i;
+      k += (x[i] > cut);
+   }}
+   return k;
+}}
+
+// Data and MC get their own instantiation: in LoopImpl<true> the weight is the
+// constant 1 and no Sumw2 is kept, so both fold away in the fill path
+template <bool IsData>
+void {class_name}::LoopImpl()
+{{
+   if (fChain == 0) return;
+
+   // --- [1] Setup Output File ---
+   std::cout << "[Analyzer] Output File: " << fOutputFileName << std::endl;
+   TFile *f_out = new TFile(fOutputFileName, "RECREATE");
+   // LZ4 level 4: much faster to write and read back than the default compression
+   f_out->SetCompressionSettings(ROOT::CompressionSettings(ROOT::RCompressionSetting::EAlgorithm::kLZ4, 4));
+
+   // --- [2] Define Histograms ---
+   // Not attached to any directory while filling; moved into f_out just before writing
+   TH1::AddDirectory(kFALSE);
+   TH1F *h_mu_pt   = new TH1F("h_mu_pt",   "Muon p_{{T}};p_{{T}} (GeV);Events", {mu_pt});
+   TH1F *h_mu_eta  = new TH1F("h_mu_eta",  "Muon #eta;#eta;Events", {mu_eta});
+   TH1F *h_mu_phi  = new TH1F("h_mu_phi",  "Muon #phi;#phi;Events", {mu_phi});
+   TH1F *h_ele_pt  = new TH1F("h_ele_pt",  "Electron p_{{T}};p_{{T}} (GeV);Events", {ele_pt});
+   TH1F *h_ele_eta = new TH1F("h_ele_eta", "Electron #eta;#eta;Events", {ele_eta});
+   TH1F *h_ele_phi = new TH1F("h_ele_phi", "Electron #phi;#phi;Events", {ele_phi});
+   TH1F *h_jet_pt  = new TH1F("h_jet_pt",  "Jet p_{{T}};p_{{T}} (GeV);Events", {jet_pt});
+   TH1F *h_jet_eta = new TH1F("h_jet_eta", "Jet #eta;#eta;Events", {jet_eta});
+   TH1F *h_jet_phi = new TH1F("h_jet_phi", "Jet #phi;#phi;Events", {jet_phi});
+   TH1F *histos[] = {{h_mu_pt, h_mu_eta, h_mu_phi, h_ele_pt, h_ele_eta, h_ele_phi, h_jet_pt, h_jet_eta, h_jet_phi}};
+   // Data is filled with weight 1: the sum of squared weights is only needed for MC
+   if (!IsData) for (TH1F *h : histos) h->Sumw2();
+
+   std::cout << "[Analyzer] Info: " << fProcess << " | Weight: " << fWeight << " | IsData: " << fIsData << std::endl;
+
+   // --- [3] Event Loop: TTree clusters processed in parallel (OpenMP) ---
+   // Every cluster of every input file is an independent task. Each thread reads
+   // its tasks through its own TFile/TTreeReader (the MakeClass members are not
+   // thread-safe) and fills private histogram clones, merged at the end.
+   struct Range {{ TString file; Long64_t begin, end; }};
+   std::vector<TString> files; // fChain is a TTree*: a TChain, or a single tree
+   if (auto *chain = dynamic_cast<TChain*>(fChain))
+      for (TObject *el : *chain->GetListOfFiles()) files.push_back(el->GetTitle());
+   else if (fChain->GetCurrentFile())
+      files.push_back(fChain->GetCurrentFile()->GetName());
+   // The cluster boundaries of the files are read in parallel too (one task per file):
+   // with remote (XRootD) inputs a serial scan pays one open round-trip per file
+   ROOT::EnableThreadSafety();
+   std::vector<std::vector<Range>> fileRanges(files.size());
+   #pragma omp parallel for schedule(dynamic, 1)
+   for (size_t i = 0; i < files.size(); i++) {{
+      std::unique_ptr<TFile> f(TFile::Open(files[i]));
+      TTree *t = f ? f->Get<TTree>(fChain->GetName()) : nullptr;
+      if (!t) {{
+         #pragma omp critical
+         std::cerr << "[Analyzer] Skipping " << files[i] << std::endl;
+         continue;
+      }}
+      const Long64_t n = t->GetEntries();
+      auto it = t->GetClusterIterator(0);
+      for (Long64_t b = it(); b < n; b = it()) fileRanges[i].push_back({{files[i], b, it.GetNextEntry()}});
+   }}
+   std::vector<Range> ranges; // in file order
+   for (auto &fr : fileRanges) ranges.insert(ranges.end(), fr.begin(), fr.end());
+   std::cout << "[Analyzer] " << ranges.size() << " clusters on " << omp_get_max_threads() << " threads" << std::endl;
+
+   // The weight and the cuts are the same for every event; passing objects are
+   // collected in small buffers, then filled through FillEq
+   const Double_t w = IsData ? 1.0 : fWeight;
+   const Float_t kMuonPtCut = 10.f, kElectronPtCut = 10.f, kJetPtCut = 30.f;
+   const UInt_t kBufSize = 64;
+   const int nHistos = sizeof(histos) / sizeof(histos[0]);
+
+   #pragma omp parallel
+   {{
+      // Thread-private histograms and their fillers, indexed like histos[]
+      // (pt, eta, phi of Muon at 0, Electron at 3, Jet at 6)
+      TH1F *local[nHistos];
+      std::vector<FillEq<IsData>> fill;
+      fill.reserve(nHistos);
+      for (int h = 0; h < nHistos; h++) {{
+         local[h] = (TH1F*)histos[h]->Clone();
+         fill.emplace_back(local[h]);
+      }}
+
+      Double_t pt_buf[kBufSize], eta_buf[kBufSize], phi_buf[kBufSize];
+      UInt_t idx_buf[kBufSize];
+      auto fill3 = [&](int h0, UInt_t n) {{
+         auto &f_pt = fill[h0], &f_eta = fill[h0 + 1], &f_phi = fill[h0 + 2];
+         for (UInt_t j = 0; j < n; j++) {{
+            f_pt(pt_buf[j], w);
+            f_eta(eta_buf[j], w);
+            f_phi(phi_buf[j], w);
+         }}
+      }};
+
+#ifdef USE_CUDA
+      // The objects of a whole cluster are collected unselected, then cut and binned on the GPU
+      std::vector<Float_t> raw[nHistos];
+      std::vector<Double_t> counts;
+      const Float_t cuts[] = {{kMuonPtCut, kElectronPtCut, kJetPtCut}};
+#endif
+
+      std::unique_ptr<TFile> file;
+      TTree *tree = nullptr;
+      TString current;
+
+      #pragma omp for schedule(dynamic, 1)
+      for (size_t r = 0; r < ranges.size(); r++) {{
+         if (!tree || ranges[r].file != current) {{
+            current = ranges[r].file;
+            file.reset(TFile::Open(current));
+            tree = file ? file->Get<TTree>(fChain->GetName()) : nullptr;
+            if (!tree) {{ // e.g. a transient XRootD error: retried for the next range of the file
+               std::cerr << "[Analyzer] Cannot reopen " << current << ", skipping entries "
+                         << ranges[r].begin << "-" << ranges[r].end << std::endl;
+               continue;
+            }}
+            tree->SetCacheSize(fCacheSize);
+         }}
+
+         // Only the branches with a reader are read from disk
+         TTreeReader reader(tree);
+         TTreeReaderArray<Float_t> Muon_pt(reader, "Muon_pt"), Muon_eta(reader, "Muon_eta"), Muon_phi(reader, "Muon_phi");
+         TTreeReaderArray<Float_t> Electron_pt(reader, "Electron_pt"), Electron_eta(reader, "Electron_eta"), Electron_phi(reader, "Electron_phi");
+         TTreeReaderArray<Float_t> Jet_pt(reader, "Jet_pt"), Jet_eta(reader, "Jet_eta"), Jet_phi(reader, "Jet_phi");
+         reader.SetEntriesRange(ranges[r].begin, ranges[r].end);
+#ifdef USE_CUDA
+         TTreeReaderArray<Float_t> *arrays[] = {{&Muon_pt, &Muon_eta, &Muon_phi, &Electron_pt, &Electron_eta, &Electron_phi, &Jet_pt, &Jet_eta, &Jet_phi}};
+#endif
+
+         while (reader.Next()) {{
+#ifdef USE_CUDA
+            for (int h = 0; h < nHistos; h++) raw[h].insert(raw[h].end(), arrays[h]->begin(), arrays[h]->end());
+            continue;
+#endif
+            const UInt_t nMuon = Muon_pt.GetSize(), nElectron = Electron_pt.GetSize(), nJet = Jet_pt.GetSize();
+
+            // --- [Muon Loop] ---
+            // Blocks of kBufSize: SelectAbove() collects the indices of the objects
+            // passing the cut (SIMD compare + compress), then only those are copied
+            // Uses UInt_t to prevent signed/unsigned warnings
+            for (UInt_t i0 = 0; i0 < nMuon; i0 += kBufSize) {{
+                const UInt_t iEnd = i0 + std::min(nMuon - i0, kBufSize);
+                const UInt_t k = SelectAbove(Muon_pt, i0, iEnd, kMuonPtCut, idx_buf);
+                for (UInt_t j = 0; j < k; j++) {{
+                    const UInt_t i = idx_buf[j];
+                    pt_buf[j] = Muon_pt[i]; eta_buf[j] = Muon_eta[i]; phi_buf[j] = Muon_phi[i];
+                }}
+                fill3(0, k);
+            }}
+
+            // --- [Electron Loop] ---
+            for (UInt_t i0 = 0; i0 < nElectron; i0 += kBufSize) {{
+                const UInt_t iEnd = i0 + std::min(nElectron - i0, kBufSize);
+                const UInt_t k = SelectAbove(Electron_pt, i0, iEnd, kElectronPtCut, idx_buf);
+                for (UInt_t j = 0; j < k; j++) {{
+                    const UInt_t i = idx_buf[j];
+                    pt_buf[j] = Electron_pt[i]; eta_buf[j] = Electron_eta[i]; phi_buf[j] = Electron_phi[i];
+                }}
+                fill3(3, k);
+            }}
+
+            // --- [Jet Loop] ---
+            for (UInt_t i0 = 0; i0 < nJet; i0 += kBufSize) {{
+                const UInt_t iEnd = i0 + std::min(nJet - i0, kBufSize);
+                const UInt_t k = SelectAbove(Jet_pt, i0, iEnd, kJetPtCut, idx_buf);
+                for (UInt_t j = 0; j < k; j++) {{
+                    const UInt_t i = idx_buf[j];
+                    pt_buf[j] = Jet_pt[i]; eta_buf[j] = Jet_eta[i]; phi_buf[j] = Jet_phi[i];
+                }}
+                fill3(6, k);
+            }}
+         }}
+#ifdef USE_CUDA
+         // Every histogram is cut on the pT of its collection (raw[0], raw[3], raw[6])
+         for (int h = 0; h < nHistos; h++) {{
+            counts.assign(local[h]->GetNbinsX() + 2, 0.);
+            CudaFillCounts(raw[h].data(), raw[h - h % 3].data(), (int)raw[h].size(), cuts[h / 3],
+                           local[h]->GetXaxis()->GetXmin(), local[h]->GetXaxis()->GetXmax(), local[h]->GetNbinsX(), counts.data());
+            fill[h].AddCounts(counts.data(), w);
+         }}
+         for (auto &v : raw) v.clear();
+#endif
+      }}
+
+      for (auto &f : fill) f.Flush();
+      #pragma omp critical
+      for (int h = 0; h < nHistos; h++) {{
+         histos[h]->Add(local[h]);
+         delete local[h];
+      }}
+   }}
+
+#ifdef USE_RNTUPLE
+   // 'make RNTUPLE=1': one RNTuple entry per histogram (name, bin contents incl. under/overflow)
+   {{
+      auto model = ROOT::Experimental::RNTupleModel::Create();
+      auto name = model->MakeField<std::string>("name");
+      auto contents = model->MakeField<std::vector<double>>("contents");
+      auto writer = ROOT::Experimental::RNTupleWriter::Append(std::move(model), "histos", *f_out);
+      for (TH1F *h : histos) {{
+         *name = h->GetName();
+         contents->assign(h->GetArray(), h->GetArray() + h->GetNcells());
+         writer->Fill();
+      }}
+   }}
+#else
+   for (TH1F *h : histos) h->SetDirectory(f_out);
+#endif
+   f_out->Write();
+   f_out->Close();
+   std::cout << "[Analyzer] Finished." << std::endl;
+}}
+
+void {class_name}::Loop()
+{{
+   // Dispatched once per job, not per event
+   if (fIsData) LoopImpl<true>();
+   else LoopImpl<false>();
+}}
+"""
+
+# ==========================================
+# [Advanced, --cuda] GPU histogram filling (src/<class>_cuda.cu)
+# ==========================================
+CUDA_SRC_TMPL = """// GPU selection and binning for {class_name}::Loop(), built by 'make CUDA=1'.
+#include <cuda_runtime.h>
+#include <algorithm>
+#include <cstdlib>
+#include <iostream>
+#include <vector>
+
+// Counts x[i] with cut_x[i] > cut into nbins equal-width bins plus under/overflow.
+// Every block counts into its own shared-memory histogram, merged into the global one at the end.
+__global__ void FillCountsKernel(const float *x, const float *cut_x, int n, float cut,
+                                 float xmin, float xmax, float invw, int nbins, unsigned long long *hist)
+{{
+   extern __shared__ unsigned int sh[];
+   for (int b = threadIdx.x; b < nbins + 2; b += blockDim.x) sh[b] = 0;
+   __syncthreads();
+   for (int i = blockIdx.x * blockDim.x + threadIdx.x; i < n; i += gridDim.x * blockDim.x) {{
+      if (cut_x[i] > cut) {{
+         const float v = x[i];
+         int b = 0; // underflow (also NaN)
+         if (v >= xmax) b = nbins + 1; // overflow before the cast: it saturates and +1 would wrap
+         else if (v >= xmin) b = min((int)((v - xmin) * invw) + 1, nbins + 1);
+         atomicAdd(&sh[b], 1u);
+      }}
+   }}
+   __syncthreads();
+   for (int b = threadIdx.x; b < nbins + 2; b += blockDim.x)
+      if (sh[b]) atomicAdd(&hist[b], (unsigned long long)sh[b]);
+}}
+
+static void Check(cudaError_t err)
+{{
+   if (err != cudaSuccess) {{
+      std::cerr << "[CUDA] " << cudaGetErrorString(err) << std::endl;
+      std::abort();
+   }}
+}}
+
+// Adds the counts of one cluster to counts[0..nbins+1]. Called by every OpenMP thread:
+// each host thread has its own stream and device buffers, which only ever grow.
+void CudaFillCounts(const float *x, const float *cut_x, int n, float cut, double xmin, double xmax, int nbins, double *counts)
+{{
+   if (n == 0) return;
+   thread_local cudaStream_t stream = nullptr;
+   thread_local float *d_x = nullptr, *d_cut = nullptr;
+   thread_local unsigned long long *d_hist = nullptr;
+   thread_local int cap = 0, hcap = 0;
+   if (!stream) Check(cudaStreamCreate(&stream));
+   if (n > cap) {{
+      cudaFree(d_x); cudaFree(d_cut);
+      Check(cudaMalloc(&d_x, n * sizeof(float)));
+      Check(cudaMalloc(&d_cut, n * sizeof(float)));
+      cap = n;
+   }}
+   if (nbins + 2 > hcap) {{
+      cudaFree(d_hist);
+      Check(cudaMalloc(&d_hist, (nbins + 2) * sizeof(unsigned long long)));
+      hcap = nbins + 2;
+   }}
+
+   Check(cudaMemcpyAsync(d_x, x, n * sizeof(float), cudaMemcpyHostToDevice, stream));
+   // The pT histograms are cut on their own values: copied only once
+   const float *cut_src = d_x;
+   if (cut_x != x) {{
+      Check(cudaMemcpyAsync(d_cut, cut_x, n * sizeof(float), cudaMemcpyHostToDevice, stream));
+      cut_src = d_cut;
+   }}
+   Check(cudaMemsetAsync(d_hist, 0, (nbins + 2) * sizeof(unsigned long long), stream));
+
+   const int threads = 256, blocks = std::min((n + threads - 1) / threads, 1024);
+   FillCountsKernel<<<blocks, threads, (nbins + 2) * sizeof(unsigned int), stream>>>(
+      d_x, cut_src, n, cut, (float)xmin, (float)xmax, (float)(nbins / (xmax - xmin)), nbins, d_hist);
+   Check(cudaGetLastError());
+
+   std::vector<unsigned long long> h(nbins + 2);
+   Check(cudaMemcpyAsync(h.data(), d_hist, (nbins + 2) * sizeof(unsigned long long), cudaMemcpyDeviceToHost, stream));
+   Check(cudaStreamSynchronize(stream));
+   for (int b = 0; b < nbins + 2; b++) counts[b] += h[b];
+}}
+"""
+
+# ==========================================
+# [Numba backend] analyzer.py
+# ==========================================
+NUMBA_TMPL = '''#!/usr/bin/env python3
+"""
+Numba analyzer for {class_name} (generated by setup_framework.py --backend numba)
+Usage: ./analyzer.py {usage}
+"""
+import sys
+import numpy as np
+import numba
+import uproot
+import awkward as ak
+
+TREE_NAME = "{tree_name}"
+STEP_SIZE = "200 MB" # Amount of data read per chunk
+
+# (name, title, branch, cut branch, cut, nbins, xmin, xmax)
+HISTOS = [
+{histos}]
+
+
+# cache: compiled once, then reused by every later run/job (no JIT at startup)
+# fastmath: reassociation lets the sums vectorize; NaN/inf semantics are kept
+# (no 'nnan'/'ninf'): the NaN comparisons stay false, so fill() puts NaN in the
+# underflow bin (b = 0), as FillEq does in the C++ Loop()
+@numba.njit(parallel=True, nogil=True, cache=True, fastmath={{"nsz", "arcp", "contract", "reassoc"}})
+def fill(values, cut_values, cut, nbins, xmin, xmax):
+    """
+    Histograms values[cut_values > cut] over the flattened (jagged) content.
+    Each thread fills its own partial histogram, so the parallel loop needs no atomics.
+    Returns (counts incl. under/overflow, sum of x, sum of x^2 of the in-range entries).
+    """
+    nthreads = numba.get_num_threads()
+    counts = np.zeros((nthreads, nbins + 2))
+    sx = np.zeros(nthreads)
+    sx2 = np.zeros(nthreads)
+    n = values.shape[0]
+    step = (n + nthreads - 1) // nthreads
+    scale = nbins / (xmax - xmin)
+    for t in numba.prange(nthreads):
+        for i in range(t * step, min(n, (t + 1) * step)):
+            if cut_values[i] > cut:
+                x = values[i]
+                b = 0 # underflow (also NaN: both comparisons are false)
+                if x >= xmax:
+                    b = nbins + 1
+                elif x >= xmin:
+                    b = 1 + min(int((x - xmin) * scale), nbins - 1)
+                    sx[t] += x
+                    sx2[t] += x * x
+                counts[t, b] += 1
+    return counts.sum(axis=0), sx.sum(), sx2.sum()
+
+
+def read_file_list(list_file):
+    # A single ROOT file (local path or root:// URL) can be given instead of a list
+    if list_file.endswith(".root"):
+        return [f"{{list_file}}:{{TREE_NAME}}"]
+    with open(list_file) as f:
+        return [f"{{ln.strip()}}:{{TREE_NAME}}" for ln in f if ln.strip() and not ln.startswith("#")]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {{sys.argv[0]}} {usage}")
+        sys.exit(1)
+
+    list_file = sys.argv[1]
+    out_file  = sys.argv[2] if len(sys.argv) > 2 else "output.root"
+{extra_args}
+    branches = sorted({{b for h in HISTOS for b in (h[2], h[3])}})
+    acc = {{h[0]: [np.zeros(h[5] + 2), 0.0, 0.0] for h in HISTOS}}
+
+    for chunk in uproot.iterate(read_file_list(list_file), branches, step_size=STEP_SIZE, library="ak"):
+        # The cuts are per object and the weight is the same for every event,
+        # so the kernels only need the flattened content arrays (no offsets)
+        flat = {{b: ak.to_numpy(ak.flatten(chunk[b], axis=None)).astype(np.float32) for b in branches}}
+        for name, _, branch, cut_branch, cut, nbins, xmin, xmax in HISTOS:
+            counts, sx, sx2 = fill(flat[branch], flat[cut_branch], cut, nbins, xmin, xmax)
+            a = acc[name]
+            a[0] += counts
+            a[1] += sx
+            a[2] += sx2
+
+    with uproot.recreate(out_file) as f_out:
+        for name, title, _, _, _, nbins, xmin, xmax in HISTOS:
+            counts, sx, sx2 = acc[name]
+            n_in = counts[1:-1].sum()
+            title, xtitle, ytitle = title.split(";")
+            f_out[name] = uproot.writing.identify.to_TH1x(
+                fName=name, fTitle=title, data=w * counts,
+                fEntries=counts.sum(), fTsumw=w * n_in, fTsumw2=w * w * n_in,
+                fTsumwx=w * sx, fTsumwx2=w * sx2, fSumw2=w * w * counts,
+                fXaxis=uproot.writing.identify.to_TAxis("xaxis", xtitle, nbins, xmin, xmax),
+                fYaxis=uproot.writing.identify.to_TAxis("yaxis", ytitle, 1, 0.0, 1.0),
+            )
+    print(f"[Numba] Output saved to {{out_file}}")
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+NUMBA_HISTOS = {
+    "basic": """\
+    ("h_mu_pt",   "Muon p_{{T}};p_{{T}} (GeV);Events", "Muon_pt", "Muon_pt", -np.inf, {mu_pt}),
+""",
+    "advanced": """\
+    ("h_mu_pt",   "Muon p_{{T}};p_{{T}} (GeV);Events",     "Muon_pt",      "Muon_pt",     10.0, {mu_pt}),
+    ("h_mu_eta",  "Muon #eta;#eta;Events",             "Muon_eta",     "Muon_pt",     10.0, {mu_eta}),
+    ("h_mu_phi",  "Muon #phi;#phi;Events",             "Muon_phi",     "Muon_pt",     10.0, {mu_phi}),
+    ("h_ele_pt",  "Electron p_{{T}};p_{{T}} (GeV);Events", "Electron_pt",  "Electron_pt", 10.0, {ele_pt}),
+    ("h_ele_eta", "Electron #eta;#eta;Events",         "Electron_eta", "Electron_pt", 10.0, {ele_eta}),
+    ("h_ele_phi", "Electron #phi;#phi;Events",         "Electron_phi", "Electron_pt", 10.0, {ele_phi}),
+    ("h_jet_pt",  "Jet p_{{T}};p_{{T}} (GeV);Events",      "Jet_pt",       "Jet_pt",      30.0, {jet_pt}),
+    ("h_jet_eta", "Jet #eta;#eta;Events",              "Jet_eta",      "Jet_pt",      30.0, {jet_eta}),
+    ("h_jet_phi", "Jet #phi;#phi;Events",              "Jet_phi",      "Jet_pt",      30.0, {jet_phi}),
+""",
+}
+
+NUMBA_EXTRA_ARGS = {
+    "basic": """\
+    w = 1.0
+""",
+    "advanced": """\
+    weight  = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    is_data = bool(int(sys.argv[4])) if len(sys.argv) > 4 else False
+    process = sys.argv[5] if len(sys.argv) > 5 else "Unknown"
+    w = 1.0 if is_data else weight
+    print(f"[Numba] Info: {process} | Weight: {weight} | IsData: {is_data}")
+""",
+}
+
+# [Advanced] Members injected after the first 'public:' of the MakeClass header
+USER_SETTINGS_BLOCK = """
+   // --- [Advanced] User Settings ---
+   float fWeight = 1.0f;
+   bool fIsData = false;
+   TString fProcess = "";
+   TString fOutputFileName = "output.root";
+   Long64_t fCacheSize = 100LL*1024*1024; // TTreeCache of every thread's tree in Loop(), set by main.cc
+   template <bool IsData> void LoopImpl(); // Loop() calls the Data or MC version
+   // --------------------------------
+
+"""
+
+# ==========================================
+# [Reader backend] TTreeReader analyzer class
+# ==========================================
+READER_HEADER_TMPL = """//////////////////////////////////////////////////////////
+// {class_name}: TTreeReader analyzer for tree '{tree_name}'
+// (generated instead of TTree::MakeClass).
+// Only the branches that have a reader member are read from disk:
+// add a TTreeReaderValue / TTreeReaderArray for every other branch you use.
+//////////////////////////////////////////////////////////
+
+#ifndef {class_name}_h
+#define {class_name}_h
+
+#include <TChain.h>
+#include <TFile.h>
+#include <TString.h>
+#include <TTreeReader.h>
+#include <TTreeReaderValue.h>
+#include <TTreeReaderArray.h>
+
+class {class_name} {{
+public :
+   TTree          *fChain;   //!pointer to the analyzed TTree or TChain
+   TTreeReader     fReader;
+
+   // Readers (declared after fReader, which they register with)
+{readers}{settings}   {class_name}(TTree *tree) : fChain(tree), fReader(tree) {{}}
+   virtual ~{class_name}() {{}}
+   virtual void     Loop();
+}};
+
+#endif
+"""
+
+READER_SRC_TMPL = """#define {class_name}_cxx
+#include "{class_name}.h"
+#include <iostream>
+
+void {class_name}::Loop()
+{{
+   if (fChain == 0) return;
+
+   // Each Next() reads only the branches that have a reader in {class_name}.h, e.g.
+   //    for (UInt_t i = 0; i < Muon_pt.GetSize(); i++) {{ ... Muon_pt[i] ... }}
+   Long64_t nentries = 0;
+   while (fReader.Next()) {{
+      nentries++;
+   }}
+   std::cout << "[Analyzer] Processed " << nentries << " entries" << std::endl;
+}}
+"""
+
+# [Advanced] Patterns matched against each line of the MakeClass header
+PUBLIC_RE = re.compile(r"[ \t]*public\s*:")
+SET_MAKECLASS_RE = re.compile(r"[ \t]*fChain->SetMakeClass\(1\);")
+BRANCH_PTR_RE = re.compile(r"\s*TBranch\s*\*b_(\w+);")
+
+# [Advanced] Injected in Init() right before fChain->SetMakeClass(1)
+BRANCH_STATUS_TMPL = """\
+   // --- [Advanced] Read only the branches used in Loop() ---
+   fChain->SetBranchStatus("*", 0);
+{enable}"""
+
+# Fingerprint of the tree schema the MakeClass output was generated from
+SCHEMA_HASH_FILE = ".schema_hash"
+
+# Number of leading fields in a job_config.txt line that submit_condor.py requires.
+#   basic    : ListFile OutputDirName
+#   advanced : ListFile OutputDirName Weight IsData(0/1) ProcessName
+CONDOR_N_FIELDS = {
+    "basic": 2,
+    "advanced": 5,
+}
+
+# Cores requested per job: only the OpenMP Loop() (advanced makeclass/reader),
+# RDataFrame and Numba use more than one thread
+MT_REQUEST_CPUS = 4
+
+# submit_condor.py; filled in with str.format (eos_base, n_fields, exe_name, request_cpus)
+CONDOR_TMPL = """#!/usr/bin/env python3
+import os
+import sys
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Configuration ---
+EXE_NAME = "{exe_name}"
+EOS_BASE = "{eos_base}" # Default: User's EOS
+N_FIELDS = {n_fields} # Required fields per config line
+SUBMIT_WORKERS = 8 # Concurrent condor_submit calls
+PREPARE_WORKERS = 16 # Job directories written concurrently
+REQUEST_CPUS = {request_cpus} # Cores per job (OMP_NUM_THREADS); 1 for a single-threaded Loop()
+WRAPPER_PATH = "condor/common/wrapper.sh" # Shared by every job.sub
+
+def main(config_file):
+    print(f"[INFO] Reading config: {{config_file}}")
+    with open(config_file) as f:
+        lines = [l.strip() for l in f if l.strip() and not l.startswith('#')]
+
+    write_wrapper()
+
+    # Every job directory is independent: write them concurrently
+    with ThreadPoolExecutor(max_workers=PREPARE_WORKERS) as ex:
+        sub_paths = [p for p in ex.map(prepare_job, lines) if p]
+
+    # Each condor_submit is a round-trip to the schedd: run them concurrently
+    print(f"[INFO] Submitting {{len(sub_paths)}} job(s)...")
+    with ThreadPoolExecutor(max_workers=SUBMIT_WORKERS) as ex:
+        results = list(ex.map(submit, sub_paths))
+
+    for sub_path, proc in zip(sub_paths, results):
+        status = "OK" if proc.returncode == 0 else f"FAILED ({{proc.returncode}})"
+        print(f"[SUBMIT] {{sub_path}}: {{status}} -> Logs in {{os.path.dirname(sub_path)}}")
+        sys.stdout.write(proc.stdout)
+        sys.stderr.write(proc.stderr)
+
+def submit(sub_path):
+    return subprocess.run(["condor_submit", sub_path], capture_output=True, text=True)
+
+# Writes the wrapper script run by every job (identical for all processes)
+def write_wrapper():
+    os.makedirs(os.path.dirname(WRAPPER_PATH), exist_ok=True)
+    cwd = os.getcwd()
+    wrapper = (
+        "#!/bin/bash\\n"
+        f"cd {{cwd}}\\n"  # Go to Analyzer Directory
+        "source /cvmfs/cms.cern.ch/cmsset_default.sh\\n"
+        "eval $(scramv1 runtime -sh)\\n" # Use eval instead of cmsenv
+
+        "# Verify Executable\\n"
+        f"if [ ! -f ./{{EXE_NAME}} ]; then\\n"
+        f"    echo 'ERROR: {{EXE_NAME}} not found! Please run \\\"make\\\" first.'\\n"
+        "    exit 1\\n"
+        "fi\\n"
+
+        "# Work in local scratch: outputs are staged, then copied in one xrdcp call\\n"
+        "WORK=$(mktemp -d)\\n"
+        "mkdir $WORK/staging\\n"
+        "# One thread per requested core (condor sets OMP_NUM_THREADS from request_cpus)\\n"
+        "export NUMBA_NUM_THREADS=${{OMP_NUM_THREADS:-1}}\\n"
+        "# Run Analyzer directly on the input file\\n"
+        f"./{{EXE_NAME}} $1 $WORK/staging/$2 $4 $5 $6\\n" # $1=Input $2=OutName $4=Weight $5=IsData $6=Process
+        "# Copy to EOS\\n"
+        "xrdcp -f --parallel 4 $WORK/staging/* root://eosuser.cern.ch/$3/\\n"
+        "rm -rf $WORK\\n"
+    )
+    with open(WRAPPER_PATH, 'w') as f_sh:
+        f_sh.write(wrapper)
+    os.chmod(WRAPPER_PATH, 0o755)
+
+# Writes arguments.txt and job.sub; returns the job.sub path
+def prepare_job(line):
+    parts = line.split()
+    if len(parts) < N_FIELDS:
+        print(f"[WARNING] Skipping invalid line: {{line}}")
+        return None
+
+    input_list  = parts[0]
+    output_dir  = parts[1]
+    # [Advanced] Weight IsData Process are forwarded to the analyzer
+    extra_args  = " ".join(parts[2:N_FIELDS])
+
+    # Opened directly (no separate exists() check); a missing list creates no job directory
+    try:
         with open(input_list) as f_in:
             files = [l.strip() for l in f_in if l.strip()]
-        
-        arg_file = f"{{job_dir}}/arguments.txt"
-        with open(arg_file, 'w') as f_args:
-            for i, f_path in enumerate(files):
-                chunk_name = f"{{job_dir}}/chunk_{{i}}.txt"
-                with open(chunk_name, 'w') as f_chunk: f_chunk.write(f_path)
-                # Args: [InputList] [OutputName] [EOSDir]
-                # Absolute path for chunk name to be safe
-                f_args.write(f"{{os.path.abspath(chunk_name)}} output_{{i}}.root {{EOS_BASE}}/{{output_subdir}}\\n")
-
-        # Create wrapper
-        with open(f"{{job_dir}}/wrapper.sh", 'w') as f_sh:
-            f_sh.write(f"#!/bin/bash\\ncd {{os.getcwd()}}\\n")
-            f_sh.write("source /cvmfs/cms.cern.ch/cmsset_default.sh\\ncmsenv\\n")
-            f_sh.write(f"./{{EXE_NAME}} $1 $2\\n") # $1=Input, $2=OutputName
-            f_sh.write("xrdcp -f $2 root://eosuser.cern.ch/$3/$2\\nrm $2\\n")
-        os.chmod(f"{{job_dir}}/wrapper.sh", 0o755)
-
-        # Create Submit file
-        with open(f"{{job_dir}}/job.sub", 'w') as f_sub:
-            f_sub.write(f"executable={{job_dir}}/wrapper.sh\\narguments=$(args)\\n")
-            f_sub.write(f"output={{job_dir}}/job.$(ClusterId).out\\nerror={{job_dir}}/job.$(ClusterId).err\\nlog={{job_dir}}/job.log\\n")
-            f_sub.write(f"getenv=True\\n+JobFlavour=\\"tomorrow\\"\\nqueue args from {{arg_file}}\\n")
-        
-        print(f"[INFO] Submitting {{output_subdir}} -> Logs in {{job_dir}}")
-        subprocess.call(["condor_submit", f"{{job_dir}}/job.sub"])
-
-    if __name__ == "__main__":
-        if len(sys.argv) < 2: exit("Usage: python3 submit_condor.py <config.txt>")
-        main(sys.argv[1])
-    """)
-    
-    with open("submit_condor.py", "w") as f_condor:
-        f_condor.write(condor_script)
-    os.chmod("submit_condor.py", 0o755)
+    except FileNotFoundError:
+        print(f"[ERROR] List not found: {{input_list}}")
+        return None
+
+    # All files go into 'condor/<output_dir>'
+    job_dir = f"condor/{{output_dir}}"
+    os.makedirs(job_dir, exist_ok=True)
+
+    print(f"[JOB] Preparing {{output_dir}} with {{len(files)}} files.")
+
+    eos_dest = f"{{EOS_BASE}}/{{output_dir}}"
+
+    # Args: [InputFile] [OutputName] [EOSDir] ([Weight] [IsData] [Process])
+    # The input file path is passed directly and the analyzer opens it
+    # as is (no list or chunk file per job).
+    # All lines are built in memory and written with a single write.
+    arg_file = f"{{job_dir}}/arguments.txt"
+    arg_lines = [f"{{f_path}} output_{{i}}.root {{eos_dest}} {{extra_args}}\\n" for i, f_path in enumerate(files)]
+    with open(arg_file, 'w') as f_args:
+        f_args.write("".join(arg_lines))
+
+    sub_path = f"{{job_dir}}/job.sub"
+    # job.sub is built as one string and written in a single call
+    job_sub = (
+        f"executable = {{WRAPPER_PATH}}\\narguments = $(args)\\n"
+        f"output = {{job_dir}}/job.$(ClusterId).$(ProcId).out\\n"
+        f"error = {{job_dir}}/job.$(ClusterId).$(ProcId).err\\n"
+        f"log = {{job_dir}}/job.log\\n"
+        f"request_cpus = {{REQUEST_CPUS}}\\n"
+        "getenv = True\\n+JobFlavour = \\"tomorrow\\"\\n"
+        f"queue args from {{arg_file}}\\n"
+    )
+    with open(sub_path, 'w') as f_sub:
+        f_sub.write(job_sub)
+
+    return sub_path
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 submit_condor.py <config.txt>")
+        sys.exit(1)
+    main(sys.argv[1])
+"""
+
+
+def write_file(path, content, mode=0o644):
+    """
+    Writes a generated file in one go: the rendered text is encoded once and
+    handed to os.write() on an O_TRUNC descriptor (no buffered-io layer).
+    The mode is also applied when an existing file is overwritten.
+    """
+    payload = memoryview(content.encode())
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        os.fchmod(fd, mode)
+        while payload:
+            payload = payload[os.write(fd, payload):]
+    finally:
+        os.close(fd)
+
+
+def open_tree(sample_file, tree_name, verbose=False):
+    """
+    Opens the sample file with ROOT and returns (TFile, TTree).
+    Exits if ROOT, the file or the tree is not available.
+    """
+    try: import ROOT
+    except ImportError: sys.exit("[ERROR] ROOT not found.")
+    ROOT.gROOT.SetBatch(True)
+
+    # Remote (root://) samples: fetch the file header/TKeys with one large
+    # read-ahead instead of many small synchronous reads, and fail fast
+    # on an unreachable redirector.
+    ROOT.TFile.SetReadaheadSize(256 * 1024)
+    ROOT.gEnv.SetValue("NetXNG.ConnectionWindow", "10")
+    ROOT.gEnv.SetValue("NetXNG.RequestTimeout", "30")
+
+    f = ROOT.TFile.Open(sample_file, "READ")
+    if not f or f.IsZombie(): sys.exit(f"[ERROR] Cannot open {sample_file}")
+    tree = f.Get(tree_name)
+    if not tree: sys.exit(f"[ERROR] Tree '{tree_name}' not found.")
+    if verbose:
+        # GetEntriesFast() returns the entry count stored in the TTree header,
+        # which is already in memory; GetEntries() would walk the baskets.
+        print(f"[INFO] Found TTree '{tree_name}' with {tree.GetEntriesFast()} entries")
+    return f, tree
+
+
+def schema_hash(tree, class_name, layout, preset="wide", backend="makeclass"):
+    """
+    Fingerprint of everything the generated analyzer class depends on:
+    the leaves of the tree (name, title with array size, type), the class name,
+    the layout, the histogram preset and the backend (MakeClass or TTreeReader).
+    """
+    leaves = ";".join(f"{l.GetName()}:{l.GetTitle()}:{l.GetTypeName()}" for l in tree.GetListOfLeaves())
+    return hashlib.sha1(f"{class_name}|{layout}|{preset}|{backend}|{leaves}".encode()).hexdigest()
+
+
+def hist_bins(preset):
+    """
+    Binnings of a HIST_BINS preset as "nbins, xmin, xmax" strings, keyed by histogram (mu_pt, ...).
+    """
+    return {name: f"{n}, {lo}, {hi}" for name, (n, lo, hi) in HIST_BINS[preset].items()}
+
+
+def run_makeclass(tree, class_name):
+    """
+    Runs TTree::MakeClass in the current directory.
+    Produces <class_name>.h and <class_name>.C
+    """
+    print(f"[INFO] Running MakeClass('{class_name}')...")
+    tree.MakeClass(class_name)
+
+
+def inject_user_settings(class_name):
+    """
+    [Advanced] Copies the MakeClass header into include/ and injects the
+    user setting members right after the first 'public:' line.
+    Init() is made to disable every branch except the USED_BRANCHES that
+    exist in this tree, so nothing else is ever read from disk.
+    The header is streamed line by line: the branch pointers (b_*) are all
+    declared in the class body, before Init() is reached.
+    """
+    header_path = f"src/{class_name}.h"
+    declared = set()
+    public_done = status_done = False
+    with open(header_path, "r") as f_in, open(f"include/{class_name}.h", "w") as f_out:
+        for line in f_in:
+            if not status_done and SET_MAKECLASS_RE.match(line):
+                # Taken from the header itself so the list always matches the tree
+                for b in USED_BRANCHES:
+                    if b not in declared: print(f"[WARNING] Branch '{b}' not found in tree.")
+                enable = "".join(f'   fChain->SetBranchStatus("{b}", 1);\n' for b in USED_BRANCHES if b in declared)
+                f_out.write(BRANCH_STATUS_TMPL.format(enable=enable))
+                status_done = True
+            f_out.write(line)
+            if not public_done and PUBLIC_RE.match(line):
+                f_out.write(USER_SETTINGS_BLOCK)
+                public_done = True
+            elif not status_done:
+                m = BRANCH_PTR_RE.match(line)
+                if m: declared.add(m.group(1))
+    if not public_done: print(f"[WARNING] No 'public:' section found in {header_path}, user settings not injected.")
+
+    os.remove(header_path)
+
+
+def emit_analyzer_source(class_name, preset="wide"):
+    """
+    [Advanced] Replaces the MakeClass Loop() with the implemented one in src/.
+    """
+    write_file(f"src/{class_name}.C", ANALYZER_SRC_TMPL.format(class_name=class_name, **hist_bins(preset)))
+
+
+def emit_reader_class(tree, class_name, tree_name, layout, preset="wide"):
+    """
+    [Reader backend] Generates include/<class_name>.h with one TTreeReaderValue/Array
+    member per USED_BRANCHES entry of the tree, instead of running MakeClass.
+    The advanced layout reuses the implemented Loop(); the basic one gets an empty skeleton.
+    """
+    readers = ""
+    for b in USED_BRANCHES:
+        leaf = tree.GetLeaf(b)
+        if not leaf:
+            print(f"[WARNING] Branch '{b}' not found in tree.")
+            continue
+        kind = "TTreeReaderArray" if leaf.GetLeafCount() or leaf.GetLen() > 1 else "TTreeReaderValue"
+        readers += f'   {kind}<{leaf.GetTypeName()}> {b}{{fReader, "{b}"}};\n'
+
+    header = READER_HEADER_TMPL.format(
+        class_name=class_name,
+        tree_name=tree_name,
+        readers=readers,
+        settings=USER_SETTINGS_BLOCK if layout == "advanced" else "\n",
+    )
+    write_file(f"include/{class_name}.h", header)
+    if layout == "advanced":
+        emit_analyzer_source(class_name, preset)
+    else:
+        write_file(f"src/{class_name}.C", READER_SRC_TMPL.format(class_name=class_name))
+
+
+def emit_cuda_source(class_name):
+    """
+    [Advanced, --cuda] Generates src/<class_name>_cuda.cu, used by the advanced Loop() when built with CUDA.
+    Not user code: written on every run, independently of the schema hash.
+    """
+    write_file(f"src/{class_name}_cuda.cu", CUDA_SRC_TMPL.format(class_name=class_name))
+
+
+def emit_main(class_name, tree_name, layout, backend="makeclass", preset="wide", cache_mb=100):
+    # The reader class has the same interface as the MakeClass one
+    if backend == "reader": backend = "makeclass"
+    run = MAIN_RUN[backend].format(
+        class_name=class_name,
+        cache_mb=cache_mb,
+        settings=MAIN_SETTINGS[layout].format(cache_mb=cache_mb),
+        chain_cache=MAIN_CHAIN_CACHE[layout].format(cache_mb=cache_mb),
+        rdf_weight=RDF_WEIGHT[layout],
+        rdf_histos=RDF_HISTOS[layout].format(**hist_bins(preset)),
+    )
+    main_code = MAIN_TMPL.format(
+        class_name=class_name,
+        tree_name=tree_name,
+        brief="RDataFrame" if backend == "rdf" else MAIN_BRIEF[layout],
+        usage=MAIN_USAGE[layout],
+        includes=MAIN_INCLUDES[backend].format(class_name=class_name),
+        extra_args=MAIN_EXTRA_ARGS[layout],
+        run=run,
+    )
+    write_file("main.cc", main_code)
+
+
+def emit_numba(class_name, tree_name, layout, preset="wide"):
+    """
+    [Numba backend] Generates analyzer.py, which replaces main.cc, the Makefile and the MakeClass class.
+    """
+    analyzer_code = NUMBA_TMPL.format(
+        class_name=class_name,
+        tree_name=tree_name,
+        usage=MAIN_USAGE[layout],
+        histos=NUMBA_HISTOS[layout].format(**hist_bins(preset)),
+        extra_args=NUMBA_EXTRA_ARGS[layout],
+    )
+    write_file("analyzer.py", analyzer_code, 0o755)
+
+
+def root_config(option):
+    """
+    Returns the output of 'root-config <option>', so that the generated
+    Makefile does not have to run root-config on every build.
+    Falls back to a make-time call if root-config is not in the PATH.
+    """
+    try:
+        return subprocess.check_output(["root-config", option], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        print(f"[WARNING] root-config {option} failed, the Makefile will call it at build time.")
+        return f"$(shell root-config {option})"
+
+
+def emit_makefile(class_name, layout, backend="makeclass", cuda=False):
+    # The rdf backend has no analyzer class: everything is in main.cc
+    has_class = backend in ("makeclass", "reader")
+    makefile_code = MAKEFILE_TMPL.format(
+        headers=f"include/{class_name}.h" if has_class else "",
+        analyzer_srcs=f"src/{class_name}.C" if has_class else "",
+        cuda="1" if cuda else "",
+        cuda_srcs=f"src/{class_name}_cuda.cu" if cuda else "",
+        root_cflags=root_config("--cflags"),
+        root_libs=root_config("--libs"),
+    )
+    write_file("Makefile", makefile_code)
+    write_file("include/rootpch.h", PCH_HEADER)
+
+
+def emit_condor(layout, exe_name="runAnalysis", multithreaded=False):
+    """
+    Generates submit_condor.py (Pointing to 'condor/' directory)
+    Wrapper uses 'eval $(scramv1 runtime -sh)' instead of 'cmsenv' and
+    checks that the executable ('runAnalysis' or 'analyzer.py') exists before running.
+    Single-threaded analyzers request one core per job.
+    """
+    # Resolved once here and written as a literal: os.getlogin() fails
+    # without a controlling terminal (systemd, tmux, cron)
+    try: user = os.environ.get("USER") or getpass.getuser()
+    except (KeyError, OSError): user = ""
+    if not user:
+        # e.g. containers without a passwd entry: leave an obvious placeholder instead of failing
+        print("[WARNING] Cannot determine the user name, set EOS_BASE in submit_condor.py by hand.")
+        user = "USERNAME"
+    eos_base = f"/eos/user/{user[0]}/{user}/AnalyzerOutput"
+
+    request_cpus = MT_REQUEST_CPUS if multithreaded else 1
+    condor_script = CONDOR_TMPL.format(eos_base=eos_base, n_fields=CONDOR_N_FIELDS[layout], exe_name=exe_name,
+                                       request_cpus=request_cpus)
+
+    write_file("submit_condor.py", condor_script, 0o755)
+
+
+def main(layout="basic"):
+    parser = argparse.ArgumentParser(description=DESCRIPTIONS[layout])
+    parser.add_argument("-f", "--file", help="Sample ROOT file path (required by the makeclass and reader backends)")
+    parser.add_argument("-t", "--tree", default="Events", help="TTree name (default: Events)")
+    parser.add_argument("-c", "--class", dest="classname", default="CMSAnalyzer", help="Class Name")
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default="makeclass",
+                        help="Analyzer backend: 'makeclass' (MakeClass skeleton, default), 'rdf' (RDataFrame in main.cc, multi-threaded), "
+                             "'reader' (TTreeReader skeleton, reads only the branches it declares) "
+                             "or 'numba' (Python analyzer.py with Numba kernels, no compilation step)")
+    parser.add_argument("--rdf", dest="backend", action="store_const", const="rdf",
+                        help="Shorthand for '--backend rdf'")
+    parser.add_argument("-p", "--preset", choices=HIST_BINS, default="wide",
+                        help="Histogram binning preset: 'wide' (full range, default) or 'narrow' (low-pT / central region)")
+    parser.add_argument("--cache-mb", type=int, default=100,
+                        help="TTreeCache size in MB (default: 100): of the chain in main.cc, or of every thread's tree in the advanced Loop()")
+    parser.add_argument("--cuda", action="store_true",
+                        help="[Advanced, makeclass/reader] Cut and fill the histograms on the GPU (CUDA, built with nvcc)")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="Only regenerate main.cc, Makefile (or analyzer.py) and submit_condor.py; "
+                             "the sample is not opened and ROOT is not loaded")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print extra information (e.g. number of entries in the sample)")
+    args = parser.parse_args()
+
+    # ROOT is only imported (in open_tree) when the analyzer class has to be generated from the tree
+    needs_tree = args.backend in ("makeclass", "reader") and not args.dry_run
+    if needs_tree and not args.file:
+        parser.error(f"-f/--file is required by the '{args.backend}' backend (or use --dry-run)")
+    if args.cuda and (layout != "advanced" or args.backend not in ("makeclass", "reader")):
+        parser.error("--cuda needs the advanced layout with the makeclass or reader backend")
+
+    sample_file = args.file
+    tree_name = args.tree
+    class_name = args.classname
+    output_dir = class_name
+
+    print("-" * 60)
+    print(f"[INFO] Initializing {layout.upper()} Framework in: {output_dir}/")
+    print("-" * 60)
+
+    # 1. Open File & Get Tree
+    if needs_tree:
+        f, tree = open_tree(sample_file, tree_name, args.verbose)
+
+    # 2. Create Directories
+    #    (no existence check first: makedirs creates the parents and keeps what is already there)
+    #    We don't necessarily need to create 'condor' here, submitter will do it,
+    #    but creating it ensures the structure is visible.
+    for sub in ("src", "include", "condor"):
+        os.makedirs(os.path.join(output_dir, sub), exist_ok=True)
+
+    original_cwd = os.getcwd()
+    os.chdir(output_dir)
+
+    if needs_tree:
+        # 3. Generate the analyzer class (MakeClass or TTreeReader), unless the existing header
+        #    was generated from the same tree schema (this also keeps the user's edits in src/ untouched)
+        new_hash = schema_hash(tree, class_name, layout, args.preset, args.backend)
+        old_hash = None
+        if os.path.exists(f"include/{class_name}.h") and os.path.exists(SCHEMA_HASH_FILE):
+            with open(SCHEMA_HASH_FILE) as f_hash: old_hash = f_hash.read().strip()
+
+        if new_hash == old_hash:
+            print("[INFO] Tree schema unchanged (cache hit), keeping the existing analyzer class.")
+        elif args.backend == "reader":
+            emit_reader_class(tree, class_name, tree_name, layout, args.preset)
+            write_file(SCHEMA_HASH_FILE, new_hash + "\n")
+        else:
+            # MakeClass writes straight into src/, so the .C never has to be moved
+            os.chdir("src")
+            run_makeclass(tree, class_name)
+            os.chdir("..")
+
+            # 4. Place Header & Source
+            if layout == "advanced":
+                inject_user_settings(class_name)
+                emit_analyzer_source(class_name, args.preset)
+            else:
+                # Same directory tree: a plain rename, never a copy
+                os.rename(f"src/{class_name}.h", f"include/{class_name}.h")
+            write_file(SCHEMA_HASH_FILE, new_hash + "\n")
+        f.Close()
+
+    # 5. Generate main.cc + Makefile (or analyzer.py), submit_condor.py (At Root)
+    if args.backend == "numba":
+        emit_numba(class_name, tree_name, layout, args.preset)
+        emit_condor(layout, exe_name="analyzer.py", multithreaded=True)
+    else:
+        emit_main(class_name, tree_name, layout, args.backend, args.preset, args.cache_mb)
+        emit_makefile(class_name, layout, args.backend, args.cuda)
+        if args.cuda: emit_cuda_source(class_name)
+        emit_condor(layout, multithreaded=(layout == "advanced" or args.backend == "rdf"))
 
     os.chdir(original_cwd)
-    print("[DONE] Basic Framework Generated.")
+    print(f"[DONE] {layout.capitalize()} Framework generated in: {output_dir}/")
 
 if __name__ == "__main__":
     main()